@@ -1,15 +1,16 @@
 import argparse
-import json
 import sys
 from pathlib import Path
 from typing import Mapping
 from shutil import rmtree
 from itertools import islice
 
-from openapi_type import parse_spec
-
 from ..common.types import AttrStyle
-from ..codegen import filegen
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads  # type: ignore
 
 
 def is_empty_dir(p: Path) -> bool:
@@ -44,8 +45,14 @@ def setup(subparsers: argparse._SubParsersAction) -> argparse.ArgumentParser:
 def main(args: argparse.Namespace, in_channel=sys.stdin, out_channel=sys.stdout) -> None:
     """ $ <cmd-prefix> gen <source> <target>
     """
+    # heavy dependencies are only imported once they are needed, keeping --help responsive
+    from openapi_type import parse_spec
+    from ..codegen import filegen
+
     try:
-        with Path(args.source).open('r') as f:
+        # binary mode skips the incremental text decoder, and an unbuffered read
+        # slurps the whole file at once (its size is known upfront from fstat)
+        with Path(args.source).open('rb', buffering=0) as f:
             python_data = _read_data(f)
     except TypeError:
         # source is None, read from stdin
@@ -84,9 +91,11 @@ def _overwrite_if_allowed_and_required(args: argparse.Namespace, root: Path) ->
 
 
 def _read_data(fd) -> Mapping:
-    buf = fd.read()  # because stdin does not support seek and we want to try both json and yaml parsing
+    # because stdin does not support seek and we want to try both json and yaml parsing.
+    # Raw bytes are preferred as both parsers accept them without a decoding round-trip.
+    buf = fd.buffer.read() if hasattr(fd, 'buffer') else fd.read()
     try:
-        struct = json.loads(buf)
+        struct = json_loads(buf)
     except ValueError:
         try:
             import yaml
@@ -97,5 +106,11 @@ def _read_data(fd) -> Mapping:
                 "dependency, or use the `third_party` extra tag:\n\n"
                 "$ pip install openapi-client-generator[third_party]"
             )
-        struct = yaml.full_load(buf)
+        # LibYAML bindings are an order of magnitude faster than the pure-Python parser,
+        # but they are only available when PyYAML was built against libyaml
+        try:
+            from yaml import CSafeLoader as YamlLoader
+        except ImportError:
+            from yaml import SafeLoader as YamlLoader  # type: ignore
+        struct = yaml.load(buf, Loader=YamlLoader)
     return struct
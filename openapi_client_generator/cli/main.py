@@ -1,16 +1,26 @@
 import argparse
 import sys
 
-from pkg_resources import get_distribution
+from importlib.metadata import version
 
 from . import gen
 from ..info import DISTRIBUTION_NAME
 
 
+class VersionAction(argparse.Action):
+    """ Same as argparse's 'version' action, but looks up the installed version only when requested
+    """
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):
+        super().__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.exit(message=f'{DISTRIBUTION_NAME} {version(DISTRIBUTION_NAME)}\n')
+
+
 def main(args=None, in_channel=sys.stdin, out_channel=sys.stdout):
     parser = argparse.ArgumentParser(description='OpenAPI Client Generator')
-    parser.add_argument('-V', '--version', action='version',
-                        version=f'{DISTRIBUTION_NAME} {get_distribution(DISTRIBUTION_NAME).version}')
+    parser.add_argument('-V', '--version', action=VersionAction,
+                        help="show program's version number and exit")
     subparsers = parser.add_subparsers(title='sub-commands',
                                        description='valid sub-commands',
                                        help='additional help',
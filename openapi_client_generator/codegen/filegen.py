@@ -1,19 +1,20 @@
 """ Generates client file structure
 """
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from hashlib import blake2b
 from itertools import chain
 from pathlib import Path
-from shutil import copytree
-from typing import NamedTuple, Mapping, Iterable, Union
-from pkg_resources import get_distribution
+from shutil import copytree, copyfile, ignore_patterns
+from typing import NamedTuple, Mapping, Iterable, Union, Generator, Dict, Optional
 
 from inflection import underscore
 import openapi_type as oas
 import black
-from pyrsistent import pmap
-from pyrsistent.typing import PMap
 
 from . import templates
-from ..info import DISTRIBUTION_NAME, PACKAGE_NAME
+from ..info import cache_dir
 from ..common.types import AttrStyle
 from ..transformers import SpecMeta, openapi_to_codegen_metadata, EndpointMethod, ResolvedTypesMap, TypeContext, \
     ResolvedTypesVec
@@ -23,6 +24,18 @@ MANIFEST     = Path('MANIFEST.in')
 SETUP_PY     = Path('setup.py')
 REQUIREMENTS = Path('requirements') / 'minimal.txt'
 
+COMMON_LIBRARY = Path(__file__).resolve().parent.parent / 'common'
+
+BLACK_MODE = black.Mode(
+    line_length=100,
+    target_versions={black.TargetVersion.PY38}
+)
+
+FORMAT_CACHE_SALT = f'{black.__version__}:{BLACK_MODE.get_cache_key()}'.encode('utf-8')
+FORMAT_CACHE_MAX_ENTRIES = 10_000
+""" the least recently used formatted sources above this number are evicted after every run
+"""
+
 
 class EmptyContext(NamedTuple):
     pass
@@ -62,6 +75,7 @@ class SetupContext(NamedTuple):
 
 
 EMPTY_CONTEXT = EmptyContext()
+EMPTY_OVERRIDES = templates.OVERRIDES.render({'overrides': {}}).strip()
 
 
 Context =   ( EndpointContext
@@ -147,15 +161,20 @@ def endpoints_bindings(
     query_style: AttrStyle,
 ) -> Endpoints:
     endpoints = {}
+    packages: Dict[Path, EndpointMethod] = {}
+    endpoints_root_str = os.fspath(endpoints_root)
     for pth, item in meta.paths.items():
+        # everything derived from the path is shared by all of its methods
+        package = Path(f'{endpoints_root_str}/{pth.as_fs_path()}')
+        endpoint_url = pth.as_endpoint_url()
         for method in item.supported_methods:
-            target = endpoints_root / pth.as_fs_path() / f'{method.name}.py'
-            query_types_overrides: PMap[str, str] = pmap()
+            target = package / f'{method.name}.py'
+            query_types_overrides: Dict[str, str] = {}
             for qt in method.query_types:
-                query_types_overrides = query_types_overrides.update(qt.overrides)
+                query_types_overrides.update(qt.overrides)
             ctx = EndpointContext(
                 package_name=package_name,
-                endpoint_url=pth.as_endpoint_url(),
+                endpoint_url=endpoint_url,
                 path_params_type=render_type_context(method.path_params_type),
                 headers_type='\n\n'.join(render_type_context(x) for x in method.headers_types),
                 query_type='\n\n'.join(render_type_context(x) for x in method.query_types),
@@ -165,75 +184,122 @@ def endpoints_bindings(
                 query_style=query_style,
                 response_is_stream=method.response_is_stream,
 
-                request_overrides=templates.OVERRIDES.render({
-                    'overrides': {}
-                }).strip(),
-                response_overrides=templates.OVERRIDES.render({
-                    'overrides': {}
-                }).strip(),
+                request_overrides=EMPTY_OVERRIDES,
+                response_overrides=EMPTY_OVERRIDES,
                 query_overrides=templates.OVERRIDES.render({
                     'overrides': query_types_overrides
                 }).strip(),
             )
             endpoints[Binding(target, templates.ENDPOINT, ctx)] = method
-            # make sure there's `__init__.py` in every sub-package
-            for sub_pkg in (x for x in target.parents if x > endpoints_root):
-                endpoints[Binding(sub_pkg / '__init__.py', templates.ENDPOINT_INIT, EMPTY_CONTEXT)] = method
+            packages[package] = method
+
+    # make sure there's `__init__.py` in every sub-package.
+    # Sub-packages are shared by many endpoints, so every one of them is visited only once.
+    visited = set()
+    for sub_pkg, method in packages.items():
+        while sub_pkg > endpoints_root and sub_pkg not in visited:
+            visited.add(sub_pkg)
+            endpoints[Binding(sub_pkg / '__init__.py', templates.ENDPOINT_INIT, EMPTY_CONTEXT)] = method
+            sub_pkg = sub_pkg.parent
     return endpoints
 
 
 def generate_from_layout(l: ProjectLayout) -> None:
-    for binding in [l.readme, l.manifest, l.setup_py, l.requirements]:
+    package_init = Binding(l.client_root / '__init__.py', templates.PACKAGE_INIT, EMPTY_CONTEXT)
+    _make_dirs(chain([l.readme, l.manifest, l.setup_py, l.requirements, package_init], l.endpoints))
+    for binding in [l.readme, l.manifest, l.setup_py, l.requirements, package_init]:
         _generate_file(binding)
-    _generate_file(Binding(l.client_root / '__init__.py', templates.PACKAGE_INIT, EMPTY_CONTEXT))
     _copy_common_library(l.common_root)
     _generate_common_types(l.common_root, l.common_types)
     _generate_endpoints(l.endpoints)
     _generate_imports(l.endpoints_root)
     _mark_as_typed(l.client_root)
     _code_style(l.client_root)
+    render_type_context.cache_clear()
+    _render.cache_clear()
 
 
 def _generate_endpoints(e: Endpoints) -> None:
-    for py_binding, data in e.items():
-        _generate_file(py_binding)
+    # directories are created beforehand, so the files can be written concurrently,
+    # overlapping the rendering of one endpoint with the file I/O of others
+    with ThreadPoolExecutor() as executor:
+        for _ in executor.map(_generate_file, e.keys()):
+            pass
 
 
 def _generate_imports(root: Path, init_name: str = '__init__.py') -> None:
-    for init in chain(root.rglob(init_name), [root / init_name]):
-        import_names = (mod.name.replace('.py', '') for mod in init.parent.iterdir() if mod.name != init_name)
-        ctx = ServiceContext(import_names=import_names)._asdict()
-        with init.open('w') as f:
-            templates.SERVICE_INIT.stream(ctx).dump(f)
+    """ Every package under the root imports all its modules and sub-packages.
+    A single scandir per package yields both the names to import and the sub-packages to visit next.
+    """
+    stack = [str(root)]
+    while stack:
+        package = stack.pop()
+        import_names = []
+        with os.scandir(package) as entries:
+            for entry in entries:
+                if entry.name == init_name:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                import_names.append(entry.name.replace('.py', ''))
+        rendered = templates.SERVICE_INIT.render(ServiceContext(import_names=import_names)._asdict())
+        _write_file(os.path.join(package, init_name), rendered.encode('utf-8'), os.O_TRUNC)
+
+
+def _make_dirs(bindings: Iterable[Binding]) -> None:
+    # many files share the same parent, so every directory is created exactly once
+    for dir in {b.layout.parent for b in bindings}:
+        os.makedirs(dir, exist_ok=True)
 
 
 def _generate_file(binding: Binding) -> None:
-    if not binding.layout.parent.exists():
-        binding.layout.parent.mkdir(exist_ok=True, parents=True)
-    binding.layout.touch(exist_ok=False)
-    with binding.layout.open('w') as f:
-        binding.template.stream(binding.context._asdict()).dump(f)
+    # exclusive creation fails on existing files just like touch(exist_ok=False) did
+    _write_file(str(binding.layout), _render(binding.template, binding.context), os.O_EXCL)
+
+
+def _write_file(path: str, data: bytes, flags: int) -> None:
+    """ Contents are rendered upfront, so they go straight to the file descriptor,
+    bypassing the buffered file object layer
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | flags, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=None)
+def _render(template: templates.Template, context: Context) -> bytes:
+    """ Many bindings share the same template and context (every sub-package's ``__init__.py``, for instance),
+    so identical files are rendered only once
+    """
+    return template.render(context._asdict()).encode('utf-8')
 
 
 def _copy_common_library(common_root: Path) -> None:
-    dist = get_distribution(DISTRIBUTION_NAME)
-    copytree(str(Path(dist.location) / PACKAGE_NAME / 'common'), str(common_root))
+    # Hard links are not an option, as the copied files are modified in place afterwards.
+    # Plain content copies skip the permission and timestamp syscalls of the default copy2.
+    copytree(
+        str(COMMON_LIBRARY),
+        str(common_root),
+        copy_function=copyfile,
+        ignore=ignore_patterns('__pycache__'),
+    )
 
 
 def _generate_common_types(common_root: Path, common_types: ResolvedTypesVec) -> None:
-    processed = set()  # TODO: discover why duplicates exist
-    with (common_root / 'types.py').open('a') as f:
-        for typ in common_types:
-            if typ in processed:
-                continue
-            processed.add(typ)
-            f.write('\n')
-            f.write(render_type_context(typ))
-            f.write('\n\n')
+    rendered = ''.join(f'\n{render_type_context(typ)}\n\n' for typ in common_types)
+    with (common_root / 'types.py').open('ab') as f:
+        f.write(rendered.encode('utf-8'))
 
 
 
+@lru_cache(maxsize=None)
 def render_type_context(t: TypeContext) -> str:
+    """ Shared request/response/header types show up in many endpoints, hence the memoization
+    """
     return templates.DATA_TYPE.render({x: getattr(t, x) for x in chain(t._fields, ['ordered_attrs', 'common_reference_render'])}).strip()
 
 
@@ -242,13 +308,102 @@ def _mark_as_typed(dir: Path) -> None:
 
 
 def _code_style(dir: Path) -> None:
-    for file in dir.rglob('**/*.py'):
-        black.format_file_in_place(
-            src=file.absolute(),
-            fast=False,
-            mode=black.Mode(
-                line_length=100,
-                target_versions={black.TargetVersion.PY38}
-            ),
-            write_back=black.WriteBack.YES
-        )
+    # black is single-threaded, but files are formatted independently of each other
+    with ProcessPoolExecutor() as executor:
+        for _ in executor.map(_format_file, _iter_py_files(str(dir.absolute())), chunksize=8):
+            pass
+    cache = _format_cache()
+    if cache is not None:
+        _prune_format_cache(cache)
+
+
+def _iter_py_files(root: str) -> Generator[str, None, None]:
+    """ Walk the tree with scandir, as its entries already know their types without extra stat calls
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.py'):
+                    yield entry.path
+
+
+def _format_file(file: str) -> None:
+    """ Templates are deterministic, so the same generated source is always formatted the same way.
+    Formatted sources are therefore cached by the hash of their unformatted contents.
+    """
+    path = Path(file)
+    source = path.read_bytes()
+    cache = _format_cache()
+    if cache is None:
+        formatted = _black_format(source)
+    else:
+        cached = cache / blake2b(FORMAT_CACHE_SALT + source, digest_size=16).hexdigest()
+        try:
+            formatted = cached.read_bytes()
+        except OSError:
+            formatted = _black_format(source)
+            _store_formatted(cached, formatted)
+        else:
+            _touch(cached)
+    if formatted != source:
+        path.write_bytes(formatted)
+
+
+@lru_cache(maxsize=None)
+def _format_cache() -> Optional[Path]:
+    """ Resolved once per worker process rather than on import
+    """
+    root = cache_dir()
+    return None if root is None else root / 'black'
+
+
+def _black_format(source: bytes) -> bytes:
+    try:
+        return black.format_file_contents(
+            source.decode('utf-8'),
+            fast=True,  # output comes from our own templates, no need to re-check AST equivalence
+            mode=BLACK_MODE,
+        ).encode('utf-8')
+    except black.NothingChanged:
+        return source
+
+
+def _store_formatted(cached: Path, formatted: bytes) -> None:
+    try:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        # other workers may be storing the same entry, hence the atomic replace of a private file
+        tmp = cached.with_suffix(f'.{os.getpid()}')
+        tmp.write_bytes(formatted)
+        os.replace(tmp, cached)
+    except OSError:
+        # the cache is merely an optimisation, an unwritable cache dir must not fail the generation
+        pass
+
+
+def _touch(cached: Path) -> None:
+    """ Mark the entry as recently used, so that pruning keeps it
+    """
+    try:
+        os.utime(cached)
+    except OSError:
+        pass
+
+
+def _prune_format_cache(cache: Path, max_entries: int = FORMAT_CACHE_MAX_ENTRIES) -> None:
+    try:
+        with os.scandir(cache) as entries:
+            files = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.is_file()]
+    except OSError:
+        return
+    if len(files) <= max_entries:
+        return
+    files.sort()
+    for _, stale in files[:len(files) - max_entries]:
+        try:
+            os.unlink(stale)
+        except OSError:
+            # another run may be pruning the same cache
+            pass
@@ -1,9 +1,33 @@
-from jinja2 import Environment, PackageLoader, Template, StrictUndefined
+import os
+from typing import Optional
+
+from jinja2 import Environment, PackageLoader, Template, StrictUndefined, BytecodeCache, FileSystemBytecodeCache
+
+from ..info import cache_dir
+
+
+def bytecode_cache() -> Optional[BytecodeCache]:
+    """ Compiled templates are persisted between runs, so that every run after the first one
+    skips lexing, parsing and compiling of the templates
+    """
+    root = cache_dir()
+    if root is None:
+        return None
+    directory = root / 'templates'
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    if not os.access(directory, os.W_OK):
+        return None
+    return FileSystemBytecodeCache(str(directory))
 
 
 templates = Environment(
     loader=PackageLoader('openapi_client_generator', 'codegen/templates'),
-    undefined=StrictUndefined  # raise exception on missing variables
+    undefined=StrictUndefined,  # raise exception on missing variables
+    auto_reload=False,          # templates are packaged with the generator and never change at runtime
+    bytecode_cache=bytecode_cache(),
 )
 
 
@@ -1,4 +1,8 @@
+import json
 from enum import Enum
+from functools import lru_cache
+from math import isfinite
+from types import MappingProxyType
 from typing import ( Mapping
                    , NamedTuple
                    , TypeVar
@@ -12,7 +16,43 @@ from typing import ( Mapping
                    )
 import requests
 from inflection import dasherize
-from pyrsistent import pmap
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def stdlib_json_dumps(obj: Any) -> bytes:
+    # same as what requests does for json= payloads
+    return json.dumps(obj, allow_nan=False).encode('utf-8')
+
+
+def has_non_finite_float(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return not isfinite(obj)
+    if isinstance(obj, dict):
+        return any(has_non_finite_float(x) for x in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(has_non_finite_float(x) for x in obj)
+    return False
+
+
+def json_dumps(obj: Any) -> bytes:
+    """ Encodes JSON payloads with orjson when it's available, producing the same results as the stdlib encoder
+    """
+    if orjson is None:
+        return stdlib_json_dumps(obj)
+    try:
+        rv = orjson.dumps(obj)
+    except TypeError:
+        # non-str keys and integers beyond 64 bits are only supported by the stdlib encoder
+        return stdlib_json_dumps(obj)
+    # orjson writes non-finite floats as null, so payloads containing nulls are checked for them
+    if b'null' in rv and has_non_finite_float(obj):
+        raise ValueError('Out of range float values are not JSON compliant')
+    return rv
 
 
 __all__ = ('Client', 'Method', 'Stream')
@@ -21,6 +61,11 @@ __all__ = ('Client', 'Method', 'Stream')
 http = requests.Session()
 
 
+header_name = lru_cache(maxsize=512)(dasherize)
+""" Endpoints send the same few headers over and over again, so there's no need to dasherize them on every call
+"""
+
+
 Req = TypeVar('Req')
 Resp = TypeVar('Resp')
 Param = TypeVar('Param')
@@ -46,7 +91,13 @@ class Method(Enum):
     OPTIONS = 'options'
 
 
+HTTP_METHOD = {m: m.value.upper() for m in Method}
+""" Request-line representation of methods, computed once rather than on every call
+"""
+
+
 Headers = Mapping[str, Optional[str]]
+NO_HEADERS: Headers = MappingProxyType({})
 Seconds = int
 
 
@@ -58,21 +109,22 @@ class Client(NamedTuple):
         self,
         method: Method,
         url: str,
-        headers: Headers = pmap(),
+        headers: Headers = NO_HEADERS,
         query: Optional[Mapping[str, Any]] = None,
         payload: Optional[Mapping[str, Any]] = None,
         is_stream: bool = False
     ) -> requests.Response:
-        url = '/'.join([self.service_url.rstrip('/'), url.lstrip('/')])
+        url = f"{self.service_url.rstrip('/')}/{url.lstrip('/')}"
 
-        req = requests.Request(
-            method.value.upper(),
-            url,
+        # preparing the request directly skips the intermediate requests.Request object
+        req = requests.PreparedRequest()
+        req.prepare(
+            method=HTTP_METHOD[method],
+            url=url,
             params=query,
-            data=payload if headers['content-type'] == 'application/x-www-form-urlencoded' else None,
-            json=payload if headers['content-type'] == 'application/json' else None,
-            headers={dasherize(k): v for k, v in headers.items() if v is not None}
-        ).prepare()
+            data=encode_payload(headers.get('content-type'), payload),
+            headers=prepare_headers(headers),
+        )
 
         return http.send(req,
             stream=is_stream,
@@ -80,6 +132,27 @@ class Client(NamedTuple):
         )
 
 
+def prepare_headers(headers: Headers) -> Optional[Mapping[str, str]]:
+    if not headers:
+        return None
+    rv = {header_name(k): v for k, v in headers.items()}
+    # unset headers are rare, so the filtering pass is only done when it's needed
+    if None in rv.values():
+        rv = {k: v for k, v in rv.items() if v is not None}
+    return rv  # type: ignore
+
+
+def encode_payload(content_type: Optional[str], payload: Optional[Mapping[str, Any]]) -> Any:
+    if payload is None:
+        return None
+    if content_type == 'application/json':
+        return json_dumps(payload)
+    if content_type == 'application/x-www-form-urlencoded':
+        # requests takes care of urlencoding
+        return payload
+    return None
+
+
 NonNullableItems = Iterable[Tuple[str, Any]]
 
 
@@ -90,6 +163,11 @@ def only_provided_values(xs: NonNullableItems) -> Mapping[str, Any]:
 T = TypeVar('T')
 
 
+CHUNK_SIZE = 64 * 1024
+""" default size of streamed chunks, large enough to avoid a Python-level iteration per small socket read
+"""
+
+
 class Stream(NamedTuple):
     """ Stream wrapper with a few helper methods
     """
@@ -97,12 +175,19 @@ class Stream(NamedTuple):
     """ response stream that needs to be closed regardless stream consumption
     strategy
     """
-    def byte_chunks(self, size: int) -> Generator[bytes, None, None]:
+    def byte_chunks(self, size: int = CHUNK_SIZE, decode_content: bool = True) -> Generator[bytes, None, None]:
         """ iterate over bytes of size ``chunk_size`` coming to the receiving socket
+
+        :param decode_content: when False, the bytes are passed through exactly as they were sent by the server,
+                               without undoing its Content-Encoding (gzip, deflate, etc.)
         """
         # enter the context as we need to close the stream upon exhaustion or GC
         with self.response:
-            for chunk in self.response.iter_content(chunk_size=size):
+            if decode_content:
+                chunks = self.response.iter_content(chunk_size=size)
+            else:
+                chunks = self.response.raw.stream(size, decode_content=False)
+            for chunk in chunks:
                 yield chunk
 
     def byte_lines(self) -> Generator[bytes, None, None]:
@@ -121,7 +206,7 @@ class Stream(NamedTuple):
         for line in self.byte_lines():
             yield line.decode('utf-8')
 
-    def map_byte_chunks(self, f: Callable[[bytes], T], size: int) -> Generator[T, None, None]:
+    def map_byte_chunks(self, f: Callable[[bytes], T], size: int = CHUNK_SIZE) -> Generator[T, None, None]:
         for chunk in self.byte_chunks(size=size):
             yield f(chunk)
 
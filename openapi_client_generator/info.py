@@ -1,2 +1,25 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+
 DISTRIBUTION_NAME = 'openapi-client-generator'
 PACKAGE_NAME = 'openapi_client_generator'
+NO_CACHE_ENV = 'OPENAPI_CLIENT_GENERATOR_NO_CACHE'
+""" setting this environment variable to a non-empty value disables all on-disk caches
+"""
+
+
+def cache_dir() -> Optional[Path]:
+    """ Per-user directory for the data persisted between runs, or None if there is no such directory
+    """
+    if os.environ.get(NO_CACHE_ENV):
+        return None
+    root = os.environ.get('XDG_CACHE_HOME', '')
+    if not os.path.isabs(root):
+        # relative paths are invalid according to the XDG spec and must be ignored
+        root = os.path.expanduser('~/.cache')
+        if root.startswith('~'):
+            # home directory cannot be determined
+            return None
+    return Path(root) / DISTRIBUTION_NAME
@@ -2,22 +2,28 @@
 """
 import re
 from pathlib import Path
-from functools import reduce
-from typing import NamedTuple, Mapping, Sequence, Generator, Optional, Callable, Any, Tuple, Union
+from functools import lru_cache
+from typing import NamedTuple, Mapping, Sequence, Optional, Callable, Any, Tuple, Union, List, Dict, Iterator, FrozenSet
 
 from typeit.utils import normalize_name
 import openapi_type as oas
-from inflection import underscore, camelize, singularize
+import inflection
 from pyrsistent.typing import PVector, PMap
 from pyrsistent import pmap, pvector
-import deepmerge
 
 
 from .schemas import camelized_python_name, pythonize_path_segment, EndpointSegment, NormalizedSchemas, normalize_schema
 
 
+underscore = lru_cache(maxsize=4096)(inflection.underscore)
+camelize = lru_cache(maxsize=4096)(inflection.camelize)
+singularize = lru_cache(maxsize=4096)(inflection.singularize)
+""" the same attribute and type names recur all over a spec, and inflection runs several regex passes per call
+"""
+
+
 class EndpointSegments(NamedTuple):
-    segments: Sequence[EndpointSegment]
+    segments: Tuple[EndpointSegment, ...]
 
     def as_fs_path(self) -> Path:
         """ Represent the segments as a filesystem path
@@ -27,7 +33,7 @@ class EndpointSegments(NamedTuple):
     def as_endpoint_url(self) -> str:
         """ Represent the segments as a endpoint url
         """
-        return '/'.join(x.placeholder if x.placeholder else x.original for x in self.segments)
+        return '/'.join(f'{{{x.placeholder}}}' if x.placeholder else x.original for x in self.segments)
 
 
 class Params(NamedTuple):
@@ -72,7 +78,7 @@ class TypeDescr(NamedTuple):
 class TypeContext(NamedTuple):
     name: str
     docstring: str = ''
-    attrs: PVector[TypeAttr] = pvector()
+    attrs: Tuple[TypeAttr, ...] = ()
     is_enum: bool = False
     common_reference_as: Optional[str] = None
     """ if a type is a reference to a common (shared) type, it will be imported from a common domain
@@ -107,7 +113,7 @@ DEFAULT_REQUEST_TYPE      = TypeContext(name='Request')
 DEFAULT_RESPONSE_TYPE     = TypeContext(name='Response')
 DEFAULT_HEADERS_TYPE      = TypeContext(
     name='Headers',
-    attrs=pvector([
+    attrs=(
         TypeAttr(
             name='accept',
             datatype='str',
@@ -132,7 +138,7 @@ DEFAULT_HEADERS_TYPE      = TypeContext(
             default="None",
             is_required=False
         ),
-    ])
+    )
 )
 
 
@@ -148,7 +154,7 @@ class EndpointMethod(NamedTuple):
     response_is_stream: bool = False
 
 
-SupportedMethods = Generator[EndpointMethod, None, None]
+SupportedMethods = Tuple[EndpointMethod, ...]
 
 
 class Endpoint(NamedTuple):
@@ -158,8 +164,8 @@ class Endpoint(NamedTuple):
     supported_methods: SupportedMethods
 
 
-ResolvedTypesMap = PMap[str, TypeContext]
-ResolvedTypesVec = PVector[TypeContext]  # needed for ordering
+ResolvedTypesMap = Mapping[str, TypeContext]
+ResolvedTypesVec = Sequence[TypeContext]  # needed for ordering
 
 
 class SpecMeta(NamedTuple):
@@ -174,29 +180,35 @@ class SpecMeta(NamedTuple):
 
 
 def openapi_to_codegen_metadata(spec: oas.OpenAPI) -> SpecMeta:
-    paths = {}
-
     common_schemas_registry = normalize_schema(spec.components.schemas)
     common_schema_types = resolve_schemas(
         common_schema_types=pmap(),
         common_schemas_registry=common_schemas_registry
     )
-    common_schema_types = pvector(x._replace(name=camelized_python_name(x.name)) for x in common_schema_types)
-    common_schema_types_ = pmap((x.name, x) for x in common_schema_types)
-
-    for path, item in spec.paths.items():
-        pth = api_path_to_filepath(path)
-        endpoint = Endpoint(
+    # a type referenced by other common types is resolved along with them before its own entry is reached,
+    # hence the duplicates that are dropped here while preserving the order of the first occurrences
+    unique_types: Dict[TypeContext, None] = {}
+    common_schema_types_: Dict[str, TypeContext] = {}
+    for typ in common_schema_types:
+        typ = typ._replace(name=camelized_python_name(typ.name))
+        if typ not in unique_types:
+            unique_types[typ] = None
+            common_schema_types_[typ.name] = typ
+    common_schema_types = tuple(unique_types)
+
+    paths = {
+        api_path_to_filepath(path): Endpoint(
             path_item=item,
-            supported_methods=iter_supported_methods(
+            supported_methods=tuple(iter_supported_methods(
                 common_types=common_schema_types_,
                 common_params=spec.components.parameters,
                 common_responses=spec.components.responses,
                 common_schemas_registry=common_schemas_registry,
                 path=item
-            )
+            ))
         )
-        paths[pth] = endpoint
+        for path, item in spec.paths.items()
+    }
 
     return SpecMeta(
         spec=spec,
@@ -207,11 +219,12 @@ def openapi_to_codegen_metadata(spec: oas.OpenAPI) -> SpecMeta:
 
 
 def resolve_schemas(
-    common_schema_types: ResolvedTypesMap,
+    common_schema_types: PMap[str, TypeContext],
     common_schemas_registry: NormalizedSchemas,
 ) -> ResolvedTypesVec:
-    resolved_types: PVector[TypeContext] = pvector()
+    resolved_types: List[TypeContext] = []
     for type_name, schema in common_schemas_registry.items():
+        py_type_name = camelized_python_name(type_name)
         py_name, default, resolved = recursive_resolve_schema(
             registry=common_schemas_registry,
             suggested_type_name=type_name,
@@ -220,18 +233,18 @@ def resolve_schemas(
             common_types=common_schema_types,
         )
         if resolved:
-            resolved_types = resolved_types.extend(resolved)
+            resolved_types.extend(resolved)
             resolved_common_type = resolved[-1]
         else:
             typ = TypeContext(
-                name=camelized_python_name(type_name),
-                attrs=pvector(),
+                name=py_type_name,
+                attrs=(),
                 common_reference_as=py_name
             )
-            resolved_types = resolved_types.append(typ)
+            resolved_types.append(typ)
             resolved_common_type = typ
 
-        common_schema_types = common_schema_types.set(camelized_python_name(type_name), resolved_common_type)
+        common_schema_types = common_schema_types.set(py_type_name, resolved_common_type)
 
     return resolved_types
 
@@ -247,24 +260,63 @@ class Parsed(NamedTuple):
     final_types: PVector[TypeContext] = pvector()
 
 
+ANY_PARSED   = Parsed(actual_type_name='Any', default_value='None')
+BOOL_PARSED  = Parsed(actual_type_name='bool')
+FLOAT_PARSED = Parsed(actual_type_name='float')
+INT_PARSED   = Parsed(actual_type_name='int')
+STR_PARSED   = Parsed(actual_type_name='str')
+""" results of primitive schemas without defaults are the same for every schema, so they are shared
+"""
+
+
 EMPTY_NAME = 'EMPTY'
 
 
+@lru_cache(maxsize=4096)
+def enum_member_name(value: str) -> str:
+    """ Python name of an enum member that represents the given string option
+    """
+    if not value:
+        return EMPTY_NAME
+    return underscore(NON_PYTHONIC_SYMBOLS.sub('_', value)).upper()
+
+
+ResolutionMemo = Dict[Tuple[str, int], Optional[Tuple[oas.SchemaType, Parsed]]]
+""" results of a single resolution pass keyed by (suggested type name, schema id). The schema is stored
+along with its result so that its id cannot be reused by another object while the pass is running;
+a None value marks a schema that is being resolved at the moment.
+"""
+
+
 def recursive_resolve_schema(
     registry: Mapping[str, oas.SchemaType],
     suggested_type_name: str,
     schema: oas.SchemaType,
     attr_name_normalizer: Callable[[str], str] = lambda x: x,
-    common_types: ResolvedTypesMap = pmap()
+    common_types: ResolvedTypesMap = pmap(),
+    memo: Optional[ResolutionMemo] = None,
 ) -> Parsed:
-    final_types: PVector[TypeContext] = pvector()
+    if memo is None:
+        memo = {}
+    key = (suggested_type_name, id(schema))
+    try:
+        memoized = memo[key]
+    except KeyError:
+        pass
+    else:
+        if memoized is None:
+            raise NotImplementedError(f'Recursive schemas are not supported yet: {suggested_type_name}')
+        return memoized[1]
 
     try:
         processor = SCHEMA_PROCESSOR[type(schema)]
     except KeyError:
         raise NotImplementedError(f'Unsupported recursive type: {schema}')
 
-    return processor(attr_name_normalizer, common_types, final_types, registry, schema, suggested_type_name)  # type: ignore
+    memo[key] = None
+    rv = processor(attr_name_normalizer, common_types, pvector(), registry, schema, suggested_type_name, memo)  # type: ignore
+    memo[key] = (schema, rv)
+    return rv
 
 
 def _process_inlined_object_value(
@@ -273,7 +325,8 @@ def _process_inlined_object_value(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.InlinedObjectValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
     schema_ = oas.ObjectValue(
         type='object',
@@ -287,6 +340,7 @@ def _process_inlined_object_value(
         schema=schema_,
         attr_name_normalizer=attr_name_normalizer,
         common_types=common_types,
+        memo=memo,
     )
 
 
@@ -296,13 +350,10 @@ def _process_empty_value(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.EmptyValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
-    return Parsed(
-        actual_type_name='Any',
-        default_value='None',
-        final_types=pvector(),
-    )
+    return ANY_PARSED
 
 
 def _process_unions(
@@ -311,13 +362,15 @@ def _process_unions(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: Union[oas.UnionSchemaTypeAny, oas.UnionSchemaTypeOne],
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
     if isinstance(schema, oas.UnionSchemaTypeAny):
         items = schema.any_of
     else:
         items = schema.one_of
-    options: PVector[str] = pvector()
+    options: List[str] = []
+    types: List[TypeContext] = list(final_types)
     for schema_ in items:
         variant_name = camelize(f'{camelized_python_name(suggested_type_name)}_var{len(options) + 1}')
         actual_variant_py_name, default, resolved_types = recursive_resolve_schema(
@@ -326,14 +379,14 @@ def _process_unions(
             schema=schema_,
             attr_name_normalizer=attr_name_normalizer,
             common_types=common_types,
+            memo=memo,
         )
-        options = options.append(actual_variant_py_name)
-
-        final_types = final_types.extend(resolved_types)
+        options.append(actual_variant_py_name)
+        types.extend(resolved_types)
     return Parsed(
         actual_type_name=f'({" | ".join(options)})',
         default_value=None,
-        final_types=final_types
+        final_types=pvector(types)
     )
 
 
@@ -343,20 +396,28 @@ def _process_product_schema_type(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.ProductSchemaType,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
-    to_merge = (
-        find_reference(x, registry) if isinstance(x, oas.Reference) else x for x in schema.all_of  # type: ignore
-    )
-    to_merge = (x._asdict() for x in to_merge)
-    red: Mapping[str, Any] = reduce(merge_strategy.merge, to_merge, {})
-    schema_ = oas.ObjectValue(**red)
+    # later members override the plain fields of earlier ones, while properties and required names accumulate
+    merged: Dict[str, Any] = {}
+    properties: Dict[str, oas.SchemaType] = {}
+    required: FrozenSet[str] = frozenset()
+    for member in schema.all_of:
+        if isinstance(member, oas.Reference):
+            member = find_reference(member, registry)
+        fields = member._asdict()
+        properties.update(fields.pop('properties', {}))
+        required |= fields.pop('required', frozenset())
+        merged.update(fields)
+    schema_ = oas.ObjectValue(**merged, properties=properties, required=required)
     return recursive_resolve_schema(
         registry=registry,
         suggested_type_name=suggested_type_name,
         schema=schema_,
         attr_name_normalizer=attr_name_normalizer,
-        common_types=common_types
+        common_types=common_types,
+        memo=memo,
     )
 
 
@@ -366,7 +427,8 @@ def _process_freeform_object(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.ObjectWithAdditionalProperties,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
     if schema.additional_properties in (None, True):
         return Parsed(
@@ -383,6 +445,7 @@ def _process_freeform_object(
             schema=schema.additional_properties,  # type: ignore
             attr_name_normalizer=attr_name_normalizer,
             common_types=common_types,
+            memo=memo,
         )
 
 
@@ -392,9 +455,9 @@ def _process_array(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.ArrayValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
-    sequence_type_literal = 'Sequence[{T}]'
     to_resolve = schema.items
     name = singularize(suggested_type_name)
     actual_type_name, default, resolved_types = recursive_resolve_schema(
@@ -403,13 +466,12 @@ def _process_array(
         schema=to_resolve,
         attr_name_normalizer=attr_name_normalizer,
         common_types=common_types,
+        memo=memo,
     )
-    sequence_type_literal = sequence_type_literal.format(T=actual_type_name)
-    final_types = final_types.extend(resolved_types)
     return Parsed(
-        actual_type_name=sequence_type_literal,
+        actual_type_name=f'Sequence[{actual_type_name}]',
         default_value=None,
-        final_types=final_types,
+        final_types=resolved_types,
     )
 
 
@@ -419,7 +481,8 @@ def _process_reference(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.Reference,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
     # Represents a reference to an object in common types domain
     if schema.ref.location is not oas.custom_types.RefTo.SCHEMAS:
@@ -445,13 +508,13 @@ def _process_reference(
             suggested_type_name=schema.ref.name,
             schema=to_resolve,
             attr_name_normalizer=attr_name_normalizer,
-            common_types=common_types
+            common_types=common_types,
+            memo=memo,
         )
-        final_types = final_types.extend(resolved_types)
         return Parsed(
             actual_type_name=actual_type_name,
             default_value=default,
-            final_types=final_types
+            final_types=resolved_types
         )
 
 
@@ -461,37 +524,40 @@ def _process_object(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.ObjectValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
-    attrs: PVector[TypeAttr] = pvector()
+    attrs: List[TypeAttr] = []
+    types: List[TypeContext] = list(final_types)
     for attr_name, attr_schema_type in schema.properties.items():
-        attr_type_suggested_name = camelized_python_name('_'.join([suggested_type_name, attr_name]))
+        attr_type_suggested_name = camelized_python_name(f'{suggested_type_name}_{attr_name}')
         attr_type_actual_name, default, new_types = recursive_resolve_schema(
             registry=registry,
             suggested_type_name=attr_type_suggested_name,
             schema=attr_schema_type,
             attr_name_normalizer=attr_name_normalizer,
-            common_types=common_types
+            common_types=common_types,
+            memo=memo,
         )
-        final_types = final_types.extend(new_types)
-        attrs = attrs.append(TypeAttr(
+        types.extend(new_types)
+        attrs.append(TypeAttr(
             # TODO: propagate overrides
             name=normalize_name(attr_name_normalizer(attr_name)),
             datatype=attr_type_actual_name,
             default=default,
             is_required=attr_name in schema.required
         ))
-    final_types = final_types.append(
+    types.append(
         TypeContext(
             name=camelized_python_name(suggested_type_name),
             docstring='',
-            attrs=attrs
+            attrs=tuple(attrs)
         )
     )
     return Parsed(
         actual_type_name=camelized_python_name(suggested_type_name),
         default_value=None,
-        final_types=final_types
+        final_types=pvector(types)
     )
 
 
@@ -501,12 +567,14 @@ def _process_bool(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.BooleanValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
+    if schema.default is None:
+        return BOOL_PARSED
     return Parsed(
         actual_type_name='bool',
-        default_value=None if schema.default is None else str(schema.default),
-        final_types=pvector()
+        default_value=str(schema.default),
     )
 
 
@@ -516,12 +584,14 @@ def _process_float(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.FloatValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
+    if schema.default is None:
+        return FLOAT_PARSED
     return Parsed(
         actual_type_name='float',
-        default_value=str(schema.default) if schema.default is not None else None,
-        final_types=pvector()
+        default_value=str(schema.default),
     )
 
 
@@ -531,12 +601,14 @@ def _process_integer(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.IntegerValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
+    if schema.default is None:
+        return INT_PARSED
     return Parsed(
         actual_type_name='int',
-        default_value=f"{schema.default}" if schema.default is not None else None,
-        final_types=pvector()
+        default_value=f"{schema.default}",
     )
 
 
@@ -546,13 +618,14 @@ def _process_string_or_enum(
     final_types: PVector[TypeContext],
     registry: Mapping[str, oas.SchemaType],
     schema: oas.StringValue,
-    suggested_type_name: str
+    suggested_type_name: str,
+    memo: ResolutionMemo,
 ) -> Parsed:
     if schema.enum:
         actual_type_name = camelized_python_name(suggested_type_name)
-        enum_options = pvector(
+        enum_options = tuple(
             TypeAttr(
-                name=underscore(NON_PYTHONIC_SYMBOLS.sub('_', x)).upper() if x else EMPTY_NAME,
+                name=enum_member_name(x),
                 datatype='str',
                 default=f"'{x}'",
                 is_required=True
@@ -573,11 +646,10 @@ def _process_string_or_enum(
             # construct enum value from the provided default string
             default_value = f"{actual_type_name}('{schema.default}')"
     else:
-        actual_type_name = 'str'
         if schema.default is None:
-            default_value = None
-        else:
-            default_value = f"'{schema.default}'"
+            return STR_PARSED
+        actual_type_name = 'str'
+        default_value = f"'{schema.default}'"
     return Parsed(
         actual_type_name=actual_type_name,
         final_types=final_types,
@@ -585,35 +657,21 @@ def _process_string_or_enum(
     )
 
 
+@lru_cache(maxsize=None)
 def api_path_to_filepath(api_path: str, sep: str = '/') -> EndpointSegments:
     """
     :param api_path: URL path
     :param sep: separator symbol used in API path
     """
-    segments = [pythonize_path_segment(x) for x in api_path.split(sep) if x.strip()]
+    segments = [pythonize_path_segment(x) for x in api_path.split(sep) if x and not x.isspace()]
     if not segments:
         segments = [EndpointSegment('/', 'root', None)]
-    return EndpointSegments(pvector(segments))
-
-
-PARAM_CONTAINERS: PMap[oas.ParamLocation, PVector[oas.OperationParameter]] = pmap(
-    { oas.ParamLocation.QUERY:  pvector()  # type: ignore
-    , oas.ParamLocation.PATH:   pvector()
-    , oas.ParamLocation.HEADER: pvector()
-    , oas.ParamLocation.COOKIE: pvector()
-    }
-)
+    return EndpointSegments(tuple(segments))
 
 
-def assign_param_to_container(
-    containers: PMap[oas.ParamLocation, PVector[oas.OperationParameter]],
-    param: oas.OperationParameter
-) -> PMap[oas.ParamLocation, PVector[oas.OperationParameter]]:
-    try:
-        container = containers[param.in_]
-    except KeyError:
-        raise NotImplementedError(f'Param parsing is not supported for parameters in {param.in_}')
-    return containers.set(param.in_, container.append(param))
+SUPPORTED_METHODS = ('head', 'get', 'post', 'put', 'patch', 'delete', 'trace')
+""" names of PathItem operations that get their own endpoint modules, in the order of PathItem fields
+"""
 
 
 def iter_supported_methods(
@@ -622,57 +680,67 @@ def iter_supported_methods(
     common_responses: Mapping[oas.ResponseTypeName, oas.Response],
     common_schemas_registry: NormalizedSchemas,
     path: oas.PathItem,
-) -> SupportedMethods:
+) -> Iterator[EndpointMethod]:
     """
     :param common_types: resolved types for common section
     :param path: current path
     """
-    methods = ( path.head
-              , path.get
-              , path.post
-              , path.put
-              , path.patch
-              , path.delete
-              , path.trace
-              )
-    supported_methods = ((nam, met) for nam, met in path._asdict().items() if met and met in methods)
-
-    for name, (method) in supported_methods:
-        containers = PARAM_CONTAINERS
+    for name in SUPPORTED_METHODS:
+        method = getattr(path, name)
+        if method is None:
+            continue
+
+        query_params:  List[oas.OperationParameter] = []
+        path_params:   List[oas.OperationParameter] = []
+        header_params: List[oas.OperationParameter] = []
+        cookie_params: List[oas.OperationParameter] = []
+        containers = { oas.ParamLocation.QUERY:  query_params
+                     , oas.ParamLocation.PATH:   path_params
+                     , oas.ParamLocation.HEADER: header_params
+                     , oas.ParamLocation.COOKIE: cookie_params
+                     }
         for param in method.parameters:
-            if isinstance(param, oas.OperationParameter):
-                containers = assign_param_to_container(containers, param)
-            elif isinstance(param, oas.Reference):
-                containers = assign_param_to_container(containers, common_params[oas.ParamTypeName(param.ref.name)])
-            else:
+            if isinstance(param, oas.Reference):
+                param = common_params[oas.ParamTypeName(param.ref.name)]
+            elif not isinstance(param, oas.OperationParameter):
                 raise NotImplementedError(f'Parameter as {type(param)}')
+            try:
+                container = containers[param.in_]
+            except KeyError:
+                raise NotImplementedError(f'Param parsing is not supported for parameters in {param.in_}')
+            container.append(param)
 
         params = Params(
-            query_params=containers[oas.ParamLocation.QUERY],
-            path_params=containers[oas.ParamLocation.PATH],
-            header_params=containers[oas.ParamLocation.HEADER],
-            cookie_params=containers[oas.ParamLocation.COOKIE],
+            query_params=query_params,
+            path_params=path_params,
+            header_params=header_params,
+            cookie_params=cookie_params,
         )
 
         default_headers_type = DEFAULT_HEADERS_TYPE
         if method.request_body:
+            last_meta: Optional[oas.RequestBodySchema] = None
             for content_type, meta in method.request_body.content.items():
+                last_meta = meta
                 if content_type.format in (oas.ContentTypeFormat.JSON,
                                            oas.ContentTypeFormat.ANYTHING,
                                            oas.ContentTypeFormat.FORM_URLENCODED):
                     request_schema = meta.schema
                     default_headers_type = default_headers_type._replace(
-                        attrs=pvector([
+                        attrs=tuple(
                             (
                                 item
                                 if item.name != "content_type"
                                 else item._replace(default=f"'{content_type.format.value}'")
                             )
                             for item in default_headers_type.attrs
-                        ]))
+                        ))
                     break
             else:
-                request_schema = list(method.request_body.content.items())[-1][1].schema
+                # none of the preferred formats is declared, falling back to the last one
+                if last_meta is None:
+                    raise NotImplementedError(f'Request body of "{name}" operation declares no content')
+                request_schema = last_meta.schema
 
             required_name = 'Request'
             actual_request_type_name, default, request_types = recursive_resolve_schema(
@@ -686,7 +754,7 @@ def iter_supported_methods(
                 request_types = request_types.append(
                     DEFAULT_REQUEST_TYPE._replace(
                         name=actual_request_type_name,
-                        attrs=pvector(),
+                        attrs=(),
                         common_reference_as=required_name
                     )
                 )
@@ -744,7 +812,7 @@ def iter_supported_methods(
 
 def _process_response_type(
     common_schemas_registry: NormalizedSchemas,
-    common_types: PMap[str, TypeContext],
+    common_types: ResolvedTypesMap,
     required_response_name: str,
     response: oas.Response,
     response_is_stream: bool,
@@ -755,7 +823,9 @@ def _process_response_type(
             common_reference_as=required_response_name
         )])
     else:
+        last_meta: Optional[oas.MediaType] = None
         for content_type, meta in response.content.items():
+            last_meta = meta
             if content_type.format in (oas.ContentTypeFormat.JSON,
                                        oas.ContentTypeFormat.ANYTHING,
                                        oas.ContentTypeFormat.FORM_URLENCODED,
@@ -764,8 +834,10 @@ def _process_response_type(
                 response_is_stream = content_type.format in (oas.ContentTypeFormat.EVENT_STREAM, oas.ContentTypeFormat.BINARY_STREAM)
                 break
         else:
-            last_response = list(response.content.items())[-1][1]
-            response_schema = last_response.schema
+            # none of the preferred formats is declared, falling back to the last one
+            if last_meta is None:
+                raise NotImplementedError('Response declares no content')
+            response_schema = last_meta.schema
 
         if response_schema is None:
             response_types = pvector([DEFAULT_RESPONSE_TYPE._replace(
@@ -784,7 +856,7 @@ def _process_response_type(
                 response_types = response_types.append(
                     DEFAULT_RESPONSE_TYPE._replace(
                         name=actual_response_type_name,
-                        attrs=pvector(),
+                        attrs=(),
                         common_reference_as=required_response_name
                     )
                 )
@@ -794,12 +866,12 @@ def _process_response_type(
 def infer_params_type(params: Sequence[oas.OperationParameter],
                       name_normalizer: Callable[[str], str] = lambda x: x,
                       default: TypeContext = DEFAULT_PATH_PARAMS_TYPE) -> Tuple[TypeContext, PVector[TypeContext]]:
-    final_types: PVector[TypeContext] = pvector()
     if not params:
-        return default, final_types.append(default)
+        return default, pvector([default])
 
-    rv = default
-    overrides = default.overrides
+    final_types: List[TypeContext] = []
+    attrs = list(default.attrs)
+    overrides = dict(default.overrides)
     for param in params:
         actual_type_name, default_value, resolved_types = recursive_resolve_schema(
             registry={},
@@ -808,7 +880,7 @@ def infer_params_type(params: Sequence[oas.OperationParameter],
             attr_name_normalizer=name_normalizer,
             common_types=pmap()
         )
-        final_types = final_types.extend(resolved_types)
+        final_types.extend(resolved_types)
         datatype = TypeDescr(
             name=actual_type_name,
             default_value=default_value,
@@ -818,22 +890,28 @@ def infer_params_type(params: Sequence[oas.OperationParameter],
         case_normalized = name_normalizer(param.name)
         valid_python_normalized = normalize_name(case_normalized)
         if case_normalized != valid_python_normalized:
-            overrides = overrides.set(f'{rv.name}.{valid_python_normalized}', param.name)
-
-        rv = rv._replace(
-            attrs=rv.attrs.append(
-                TypeAttr(
-                    name=valid_python_normalized,
-                    datatype=datatype.name,
-                    docstring=datatype.docstring,
-                    is_required=param.required,
-                    default=default_value,
-                )
+            overrides[f'{default.name}.{valid_python_normalized}'] = param.name
+
+        attrs.append(
+            TypeAttr(
+                name=valid_python_normalized,
+                datatype=datatype.name,
+                docstring=datatype.docstring,
+                is_required=param.required,
+                default=default_value,
             )
         )
-    rv = rv._replace(overrides=overrides)
-    final_types = final_types.append(rv)
-    return rv, final_types
+    rv = default._replace(attrs=tuple(attrs), overrides=pmap(overrides))
+    final_types.append(rv)
+    return rv, pvector(final_types)
+
+
+PRIMITIVE_TYPE_DESCR =    {   oas.IntegerValue: TypeDescr('int')
+                          ,   oas.BooleanValue: TypeDescr('bool')
+                          }
+""" schema types that map to a python primitive regardless of the schema details
+"""
+FALLBACK_TYPE_DESCR = TypeDescr('str')
 
 
 def python_type_from_openapi_schema(schema: oas.SchemaType) -> TypeDescr:
@@ -843,18 +921,10 @@ def python_type_from_openapi_schema(schema: oas.SchemaType) -> TypeDescr:
         else:
             docstring = schema.description
         return TypeDescr('str', docstring=docstring)
-    elif isinstance(schema, oas.IntegerValue):
-        return TypeDescr('int')
-    elif isinstance(schema, oas.BooleanValue):
-        return TypeDescr('bool')
-    return TypeDescr('str')
-
+    return PRIMITIVE_TYPE_DESCR.get(type(schema), FALLBACK_TYPE_DESCR)
 
-def add_to_set(config, path, base: frozenset, nxt: frozenset) -> frozenset:
-    return base | nxt
 
-
-def find_reference(ref: oas.Reference, components: ResolvedTypesMap) -> oas.ObjectValue:
+def find_reference(ref: oas.Reference, components: Mapping[str, oas.SchemaType]) -> oas.ObjectValue:
     key = camelized_python_name(ref.ref.name)
     if key not in components:
         raise NotImplementedError('Reference is not found in the registry')
@@ -863,17 +933,6 @@ def find_reference(ref: oas.Reference, components: ResolvedTypesMap) -> oas.Obje
     return obj
 
 
-merge_strategy = deepmerge.Merger(
-    [
-        (list, "append"),
-        (dict, "merge"),
-        (frozenset, add_to_set),
-    ],
-    ["override"],
-    ["override"]
-)
-
-
 SCHEMA_PROCESSOR =  {   oas.StringValue:                    _process_string_or_enum
                     ,   oas.IntegerValue:                   _process_integer
                     ,   oas.FloatValue:                     _process_float
@@ -1,4 +1,4 @@
-from string import digits
+from functools import lru_cache
 from typing import NamedTuple, Optional, Mapping, Any
 
 import openapi_type as oas
@@ -9,6 +9,8 @@ from pyrsistent import pmap
 
 NormalizedSchemas = PMap[str, oas.SchemaType]
 
+NON_PYTHONIC_PATH_SYMBOLS = str.maketrans('', '', '.,{}')
+
 
 class EndpointSegment(NamedTuple):
     """ Represents a single endpoint segment, a.k.a. a thing between '/' symbols
@@ -20,7 +22,7 @@ class EndpointSegment(NamedTuple):
     """ normalized value
     """
     placeholder: Optional[str] = None
-    """ if used as a placeholder, the value contains a string representation of it
+    """ if used as a placeholder, the value contains the normalized name of it
     """
 
 
@@ -28,6 +30,7 @@ def normalize_schema(schemas: Mapping[str, oas.SchemaType]) -> NormalizedSchemas
     return pmap({camelized_python_name(k): v for k, v in schemas.items()})
 
 
+@lru_cache(maxsize=None)
 def camelized_python_name(irregular_source: str) -> str:
     """
     :param irregular_source: source string that resembles a python name but that may contain invalid characters
@@ -36,30 +39,20 @@ def camelized_python_name(irregular_source: str) -> str:
     return camelize(pythonize_path_segment(irregular_source).segment)
 
 
+@lru_cache(maxsize=4096)
 def pythonize_path_segment(seg: str) -> EndpointSegment:
-    placeholder = {'{', '}'}
-    remove = {'.', ','} | placeholder
-    is_placeholder = False
-    final = []
-    for char in seg:
-        if char in placeholder:
-            is_placeholder = True
-            continue
-        if char in remove:
-            continue
-        final.append(char)
-
-    final_underscored = underscore(''.join(final))
+    is_placeholder = '{' in seg or '}' in seg
+    final_underscored = underscore(seg.translate(NON_PYTHONIC_PATH_SYMBOLS))
     rv = final_underscored
     if is_placeholder:
         rv = f'by_{rv}'
     else:
         # version tags are usually numeric
-        if rv[0] in digits:
+        if rv and '0' <= rv[0] <= '9':
             rv = f'v{rv}'
 
     return EndpointSegment(
         original=seg,
         segment=rv,
-        placeholder=f'{{{final_underscored}}}' if is_placeholder else None
+        placeholder=final_underscored if is_placeholder else None
     )
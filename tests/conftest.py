@@ -0,0 +1,6 @@
+import os
+
+from openapi_client_generator.info import NO_CACHE_ENV
+
+# generated test clients must not leave anything behind in the developer's cache directory
+os.environ[NO_CACHE_ENV] = '1'
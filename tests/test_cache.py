@@ -0,0 +1,98 @@
+import os
+from hashlib import blake2b
+from pathlib import Path
+
+import pytest
+
+from openapi_client_generator import info
+from openapi_client_generator.codegen import filegen
+
+
+@pytest.fixture
+def caching(monkeypatch):
+    monkeypatch.delenv(info.NO_CACHE_ENV, raising=False)
+
+
+def test_cache_dir_respects_xdg(caching, monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    assert info.cache_dir() == tmp_path / info.DISTRIBUTION_NAME
+
+
+def test_cache_dir_without_home(caching, monkeypatch):
+    monkeypatch.delenv('XDG_CACHE_HOME', raising=False)
+    # this is what expanduser returns when neither HOME nor a passwd entry is available
+    monkeypatch.setattr(info.os.path, 'expanduser', lambda path: path)
+    assert info.cache_dir() is None
+
+
+def test_cache_dir_falls_back_to_home(caching, monkeypatch):
+    monkeypatch.delenv('XDG_CACHE_HOME', raising=False)
+    monkeypatch.setenv('HOME', '/nonexistent-home')
+    assert info.cache_dir() == Path('/nonexistent-home/.cache') / info.DISTRIBUTION_NAME
+
+
+def test_cache_dir_ignores_relative_xdg(caching, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', 'relative/cache')
+    monkeypatch.setenv('HOME', '/nonexistent-home')
+    assert info.cache_dir() == Path('/nonexistent-home/.cache') / info.DISTRIBUTION_NAME
+
+
+def test_cache_dir_opt_out(monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    monkeypatch.setenv(info.NO_CACHE_ENV, '1')
+    assert info.cache_dir() is None
+
+
+SOURCE = b'x = {  }\n'
+FORMATTED = b'x = {}\n'
+
+
+def cache_entry(cache: Path, source: bytes) -> Path:
+    return cache / blake2b(filegen.FORMAT_CACHE_SALT + source, digest_size=16).hexdigest()
+
+
+def test_format_cache_hit_skips_black(monkeypatch, tmp_path):
+    cache = tmp_path / 'black'
+    cache.mkdir()
+    cache_entry(cache, SOURCE).write_bytes(FORMATTED)
+    monkeypatch.setattr(filegen, '_format_cache', lambda: cache)
+
+    def black_format(source):
+        raise AssertionError('cached sources must not be formatted again')
+    monkeypatch.setattr(filegen, '_black_format', black_format)
+
+    target = tmp_path / 'module.py'
+    target.write_bytes(SOURCE)
+    filegen._format_file(str(target))
+    assert target.read_bytes() == FORMATTED
+
+
+def test_format_cache_miss_stores_formatted(monkeypatch, tmp_path):
+    cache = tmp_path / 'black'
+    monkeypatch.setattr(filegen, '_format_cache', lambda: cache)
+
+    target = tmp_path / 'module.py'
+    target.write_bytes(SOURCE)
+    filegen._format_file(str(target))
+    assert target.read_bytes() == FORMATTED
+    assert cache_entry(cache, SOURCE).read_bytes() == FORMATTED
+
+
+def test_format_without_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(filegen, '_format_cache', lambda: None)
+
+    target = tmp_path / 'module.py'
+    target.write_bytes(SOURCE)
+    filegen._format_file(str(target))
+    assert target.read_bytes() == FORMATTED
+    assert os.listdir(tmp_path) == ['module.py']
+
+
+def test_prune_format_cache_evicts_least_recently_used(tmp_path):
+    for age, name in enumerate(['newest', 'newer', 'older', 'oldest']):
+        entry = tmp_path / name
+        entry.write_bytes(b'')
+        os.utime(entry, (1000 - age, 1000 - age))
+
+    filegen._prune_format_cache(tmp_path, max_entries=2)
+    assert sorted(os.listdir(tmp_path)) == ['newer', 'newest']
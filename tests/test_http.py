@@ -0,0 +1,124 @@
+import importlib.util
+import json
+import sys
+
+import pytest
+
+from openapi_client_generator.common import http
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """ Requests that would have been sent by the client
+    """
+    rv = []
+
+    def send(req, **kwargs):
+        rv.append(req)
+        return None
+    monkeypatch.setattr(http.http, 'send', send)
+    return rv
+
+
+CLIENT = http.Client(service_url='https://example.com/api/')
+
+
+def test_json_payload(sent):
+    CLIENT.make_call(
+        method=http.Method.POST,
+        url='/pets',
+        headers={'content-type': 'application/json', 'accept': 'application/json'},
+        query={'limit': 10},
+        payload={'name': 'Rex', 'tags': ['dog']},
+    )
+    req, = sent
+    assert req.method == 'POST'
+    assert req.url == 'https://example.com/api/pets?limit=10'
+    assert req.headers['Content-Type'] == 'application/json'
+    assert req.headers['Accept'] == 'application/json'
+    assert json.loads(req.body) == {'name': 'Rex', 'tags': ['dog']}
+
+
+def test_form_urlencoded_payload(sent):
+    CLIENT.make_call(
+        method=http.Method.PUT,
+        url='pets/1',
+        headers={'content-type': 'application/x-www-form-urlencoded'},
+        payload={'name': 'Rex', 'status': 'sold'},
+    )
+    req, = sent
+    assert req.method == 'PUT'
+    assert req.url == 'https://example.com/api/pets/1'
+    assert req.headers['Content-Type'] == 'application/x-www-form-urlencoded'
+    assert req.body == 'name=Rex&status=sold'
+
+
+def test_no_headers(sent):
+    CLIENT.make_call(method=http.Method.GET, url='/pets', payload={'ignored': True})
+    req, = sent
+    assert req.method == 'GET'
+    assert req.url == 'https://example.com/api/pets'
+    assert 'Content-Type' not in req.headers
+    assert req.body is None
+
+
+def test_unset_headers_are_not_sent(sent):
+    CLIENT.make_call(
+        method=http.Method.DELETE,
+        url='/pets/1',
+        headers={'accept': 'application/json', 'authorization': None, 'x_request_id': 'abc'},
+    )
+    req, = sent
+    assert req.method == 'DELETE'
+    assert req.headers['Accept'] == 'application/json'
+    assert req.headers['X-Request-Id'] == 'abc'
+    assert 'Authorization' not in req.headers
+    assert req.body is None
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def http_module(request, monkeypatch):
+    """ A fresh copy of the shipped module, loaded with and without orjson
+    """
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        # a None entry makes the import fail as if the package wasn't installed
+        monkeypatch.setitem(sys.modules, 'orjson', None)
+    spec = importlib.util.spec_from_file_location(f'http_with_{request.param}', http.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert (module.orjson is None) == (request.param == 'stdlib')
+    return module
+
+
+def test_json_payload_encoders(http_module, monkeypatch):
+    sent = []
+    monkeypatch.setattr(http_module.http, 'send', lambda req, **kwargs: sent.append(req))
+    http_module.Client(service_url='https://example.com').make_call(
+        method=http_module.Method.PATCH,
+        url='/pets/1',
+        headers={'content-type': 'application/json'},
+        payload={'name': 'Rex', 'weight': 12.5, 'owner': None},
+    )
+    req, = sent
+    assert req.method == 'PATCH'
+    assert req.url == 'https://example.com/pets/1'
+    assert json.loads(req.body) == {'name': 'Rex', 'weight': 12.5, 'owner': None}
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), -float('inf')])
+def test_json_payload_rejects_non_finite_floats(http_module, value):
+    with pytest.raises(ValueError):
+        http_module.encode_payload('application/json', {'x': value})
+    with pytest.raises(ValueError):
+        http_module.encode_payload('application/json', {'x': [{'y': value}]})
+
+
+@pytest.mark.parametrize('payload', [
+    {'id': 2 ** 70},
+    {'ids': {1: 'a', 2: 'b'}},
+])
+def test_json_payload_same_as_stdlib(http_module, payload):
+    body = http_module.encode_payload('application/json', payload)
+    assert json.loads(body) == json.loads(json.dumps(payload))
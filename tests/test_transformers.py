@@ -0,0 +1,130 @@
+import pytest
+import openapi_type as oas
+from inflection import underscore
+from openapi_type import parse_spec
+
+from openapi_client_generator import transformers
+from openapi_client_generator.transformers import openapi_to_codegen_metadata
+from openapi_client_generator.transformers.schemas import normalize_schema
+
+
+def make_spec(paths=None, schemas=None):
+    return parse_spec({
+        'openapi': '3.0.0',
+        'info': {'title': 'test', 'version': '1.0'},
+        'paths': paths or {},
+        'components': {'schemas': schemas or {}},
+    })
+
+
+def test_request_body_without_content():
+    spec = make_spec(paths={
+        '/items': {
+            'put': {
+                'requestBody': {'content': {}},
+                'responses': {},
+            },
+        },
+    })
+    with pytest.raises(NotImplementedError, match='Request body of "put" operation declares no content'):
+        openapi_to_codegen_metadata(spec)
+
+
+def test_all_of_does_not_modify_referenced_members():
+    spec = make_spec(schemas={
+        'Base': {
+            'type': 'object',
+            'required': ['id'],
+            'properties': {
+                'id': {'type': 'integer'},
+                'name': {'type': 'string'},
+            },
+        },
+        'Extended': {
+            'allOf': [
+                {'$ref': '#/components/schemas/Base'},
+                {
+                    'type': 'object',
+                    'required': ['status'],
+                    'properties': {
+                        'status': {'type': 'string'},
+                        'amount': {'type': 'number'},
+                    },
+                },
+            ],
+        },
+    })
+    meta = openapi_to_codegen_metadata(spec)
+    types = {x.name: x for x in meta.common_types}
+
+    assert [x.name for x in types['Base'].attrs] == ['id', 'name']
+    assert list(meta.common_schema_registry['Base'].properties) == ['id', 'name']
+
+    extended = types['Extended']
+    assert [x.name for x in extended.attrs] == ['id', 'name', 'status', 'amount']
+    assert {x.name for x in extended.attrs if x.is_required} == {'id', 'status'}
+
+
+def test_shared_reference_is_resolved_once(monkeypatch):
+    spec = make_spec(schemas={
+        'Owner': {
+            'type': 'object',
+            'properties': {
+                'first_pet': {'$ref': '#/components/schemas/Pet'},
+                'second_pet': {'$ref': '#/components/schemas/Pet'},
+            },
+        },
+        'Pet': {
+            'type': 'object',
+            'properties': {
+                'name': {'type': 'string'},
+            },
+        },
+    })
+    resolved = []
+    process_object = transformers.SCHEMA_PROCESSOR[oas.ObjectValue]
+
+    def counting_process_object(*args):
+        resolved.append(args[5])
+        return process_object(*args)
+    monkeypatch.setitem(transformers.SCHEMA_PROCESSOR, oas.ObjectValue, counting_process_object)
+
+    registry = normalize_schema(spec.components.schemas)
+    type_name, _, final_types = transformers.recursive_resolve_schema(
+        registry=registry,
+        suggested_type_name='Owner',
+        schema=registry['Owner'],
+        attr_name_normalizer=underscore,
+    )
+    assert resolved == ['Owner', 'Pet']
+    assert type_name == 'Owner'
+    # every reference contributes the referenced types, duplicates are dropped by openapi_to_codegen_metadata
+    assert [x.name for x in final_types] == ['Pet', 'Pet', 'Owner']
+    owner = final_types[-1]
+    assert [(x.name, x.datatype) for x in owner.attrs] == [('first_pet', 'Pet'), ('second_pet', 'Pet')]
+
+    # the memoized result is the same as resolving the referenced schema on its own
+    _, _, pet_types = transformers.recursive_resolve_schema(
+        registry=registry,
+        suggested_type_name='Pet',
+        schema=registry['Pet'],
+        attr_name_normalizer=underscore,
+    )
+    assert resolved == ['Owner', 'Pet', 'Pet']
+    assert list(final_types[:2]) == list(pet_types) * 2
+
+
+def test_recursive_schema():
+    spec = make_spec(schemas={
+        'Node': {
+            'type': 'object',
+            'properties': {
+                'children': {
+                    'type': 'array',
+                    'items': {'$ref': '#/components/schemas/Node'},
+                },
+            },
+        },
+    })
+    with pytest.raises(NotImplementedError, match='Recursive schemas are not supported yet: Node'):
+        openapi_to_codegen_metadata(spec)